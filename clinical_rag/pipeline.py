@@ -3,19 +3,27 @@ Main orchestration script for running Retrieval-Augmented Generation (RAG)
 over synthetic clinical notes using Gemini and FAISS.
 
 Steps:
-1. Preprocess and chunk input note
-2. Embed chunks using Gemini
-3. Build FAISS index
+1. Preprocess and lazily chunk input note
+2. Embed chunks using Gemini, one micro-batch at a time
+3. Add each embedded batch to the FAISS index (or load a saved index
+   for a note that has been indexed before)
 4. Embed user query
 5. Retrieve relevant chunks
 6. Generate final answer
 """
 
 import argparse
-from utils.preprocessing import load_patient_data, clean_text, chunk_text
-from rag.embedder import GeminiEmbedder
+import hashlib
+from itertools import islice
+from pathlib import Path
+from utils.preprocessing import load_patient_data, clean_text, iter_chunks, deduplicate_chunks
+from rag.embedder import MAX_BATCH_SIZE, MAX_INFLIGHT_BATCHES
+from rag.embedding_cache import default_cached_embedder
 from rag.retriever import FaissRetriever
-from rag.generator import GeminiGenerator
+from rag.generator import default_generator
+
+# Saved FAISS indexes, one sub-directory per (note, model, chunk size)
+INDEX_CACHE_DIR = Path(".cache/indexes")
 
 
 def run_rag_pipeline(note_path: str, query: str, top_k: int = 3, max_tokens: int = 300) -> str:
@@ -41,25 +49,42 @@ def run_rag_pipeline(note_path: str, query: str, top_k: int = 3, max_tokens: int
     str
         The generated answer based on retrieved clinical content.
     """
-    # Load from .txt or .json
-    note_text = load_patient_data(note_path)
-
-    # Clean and Chunk
-    clean = clean_text(note_text)
-    chunks = chunk_text(text = clean, max_tokens = max_tokens)
-    gen = GeminiGenerator()
+    # Load from .txt or .json and clean without keeping the raw text alive
+    clean = clean_text(load_patient_data(note_path))
 
     # Initialize components
-    embedder = GeminiEmbedder()
-    retriever = FaissRetriever(embedding_dim=768)
-    generator = GeminiGenerator()
-
-    # Embed chunks and build FAISS index
-    chunk_embeddings = [embedder.get_embedding(c) for c in chunks]
-    retriever.build_index(chunk_embeddings, chunks)
+    embedder = default_cached_embedder()
+    generator = default_generator()
+
+    # Reuse a saved index for this exact note, model and chunk size if present
+    cache_key = hashlib.sha256(
+        f"{embedder.model_name}\0{max_tokens}\0{clean}".encode("utf-8")
+    ).hexdigest()[:16]
+    index_dir = INDEX_CACHE_DIR / cache_key
+    try:
+        retriever = FaissRetriever.load(index_dir)
+    except Exception:
+        # Missing or unreadable (e.g. partially written) saves are rebuilt
+        retriever = FaissRetriever(embedding_dim=768)
+
+        # Chunk lazily and embed + index one micro-batch at a time, so the full
+        # chunk list and embedding matrix are never materialized next to the
+        # index. Each micro-batch still fills every concurrent embedding request.
+        chunks = iter_chunks(clean, max_tokens=max_tokens)
+        while True:
+            batch = list(islice(chunks, MAX_BATCH_SIZE * MAX_INFLIGHT_BATCHES))
+            if not batch:
+                break
+            # Embed each distinct chunk once, then fan vectors back out to every chunk
+            unique_chunks, inverse = deduplicate_chunks(batch)
+            retriever.add(embedder.get_embeddings(unique_chunks)[inverse], batch, copy=False)
+
+        # Promote to HNSW / move to GPU as build_index would, then persist
+        retriever.finalize()
+        retriever.save(index_dir)
 
     # Embed query and retrieve top chunks
-    query_embedding = embedder.get_embedding(query)
+    query_embedding = embedder.get_embedding(query, task_type="retrieval_query")
     top_chunks = retriever.retrieve(query_embedding, top_k=top_k)
 
     # Generate and return answer
@@ -6,10 +6,52 @@ This script runs a full PubMed RAG pipeline using:
 - Generation via Gemini
 """
 import argparse
-from pubmed_rag.search_pubmed import search_pubmed
-from rag.embedder import GeminiEmbedder
+import math
+import queue
+import threading
+from pubmed_rag.search_pubmed import FETCH_PAGE_SIZE, esearch_ids, efetch_stream
+from rag.embedding_cache import default_cached_embedder
 from rag.retriever import FaissRetriever
-from rag.generator import GeminiGenerator
+from rag.generator import default_generator
+from utils.preprocessing import deduplicate_chunks
+
+# Fetched pages allowed to wait for embedding before the fetcher blocks
+FETCH_QUEUE_SIZE = 2
+
+# Seconds the fetcher waits on a full queue before re-checking for cancellation
+FETCH_PUT_TIMEOUT = 0.5
+
+# Marks the end of the fetched pages on the queue
+_DONE = object()
+
+
+def _put_unless_stopped(pages: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put an item on the queue, giving up (and returning False) once ``stop`` is set."""
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=FETCH_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _fetch_pages(id_list: list, page_size: int, pages: queue.Queue, stop: threading.Event):
+    """
+    Producer: push pages of abstracts onto the queue, then ``_DONE`` (or the error).
+
+    Exits as soon as the consumer sets ``stop``, closing the open efetch handle.
+    """
+    stream = efetch_stream(id_list, page_size=page_size)
+    try:
+        for page in stream:
+            if not _put_unless_stopped(pages, page, stop):
+                return
+        _put_unless_stopped(pages, _DONE, stop)
+    except Exception as e:
+        _put_unless_stopped(pages, e, stop)
+    finally:
+        stream.close()
 
 
 def run_pubmed_rag_pipeline(query: str, top_k: int = 3, max_results: int = 10, email: str = "") -> str:
@@ -36,27 +78,53 @@ def run_pubmed_rag_pipeline(query: str, top_k: int = 3, max_results: int = 10, e
         Gemini-generated answer based on literature context.
     """
     print("🔍 Searching PubMed...")
-    abstracts = search_pubmed(query, max_results=max_results, email=email)
-    if not abstracts:
+    id_list = esearch_ids(query, max_results=max_results, email=email)
+    if not id_list:
         return "No relevant literature found on PubMed."
 
-    # Step 2: Embed abstracts
-    print(f"📚 Retrieved {len(abstracts)} abstracts. Embedding...")
-    embedder = GeminiEmbedder()
-    embeddings = [embedder.get_embedding(text) for text in abstracts]
-
-    # Step 3: Build FAISS index
+    # Steps 2-3: Fetch, embed and index abstracts concurrently. A background thread
+    # streams pages from NCBI while this thread embeds the previous page and
+    # adds it to the FAISS index, hiding one round-trip behind the other.
+    print(f"📚 Found {len(id_list)} articles. Fetching and embedding...")
+    embedder = default_cached_embedder()
     retriever = FaissRetriever(embedding_dim=768)
-    retriever.build_index(embeddings, abstracts)
+
+    def index_page(page: list):
+        if page:
+            unique_abstracts, inverse = deduplicate_chunks(page)
+            retriever.add(embedder.get_embeddings(unique_abstracts)[inverse], page, copy=False)
+
+    # Split the IDs into at least two pages so there is something to overlap
+    page_size = min(FETCH_PAGE_SIZE, max(1, math.ceil(len(id_list) / 2)))
+    if len(id_list) <= page_size:
+        # A single page has nothing to overlap with; skip the thread and queue
+        for page in efetch_stream(id_list, page_size=page_size):
+            index_page(page)
+    else:
+        pages = queue.Queue(maxsize=FETCH_QUEUE_SIZE)
+        stop = threading.Event()
+        threading.Thread(target=_fetch_pages, args=(id_list, page_size, pages, stop), daemon=True).start()
+        try:
+            while (page := pages.get()) is not _DONE:
+                if isinstance(page, Exception):
+                    raise page
+                index_page(page)
+        finally:
+            # Release the fetcher if embedding failed while it was blocked on the queue
+            stop.set()
+
+    if not retriever.chunk_store:
+        return "No relevant literature found on PubMed."
+    retriever.finalize()
 
     # Step 4: Embed query and retrieve top context
     print("🔎 Retrieving top relevant abstracts...")
-    query_embedding = embedder.get_embedding(query)
+    query_embedding = embedder.get_embedding(query, task_type="retrieval_query")
     top_chunks = retriever.retrieve(query_embedding, top_k=top_k)
 
     # Step 5: Generate answer
     print("🧠 Generating answer with Gemini...")
-    generator = GeminiGenerator()
+    generator = default_generator()
     answer = generator.generate_answer(query, top_chunks)
     return answer
 
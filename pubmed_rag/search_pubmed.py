@@ -3,7 +3,10 @@ Module to query PubMed and fetch abstracts using Entrez (NCBI API).
 """
 
 from Bio import Entrez
-from typing import List
+from typing import Iterator, List
+
+# Number of PubMed IDs fetched per efetch request when streaming
+FETCH_PAGE_SIZE = 20
 
 def search_pubmed(query: str, max_results: int = 10, email: str = "") -> List[str]:
     """
@@ -25,6 +28,29 @@ def search_pubmed(query: str, max_results: int = 10, email: str = "") -> List[st
     List[str]
         A list of abstracts as text blocks (title + abstract).
     """
+    id_list = esearch_ids(query, max_results=max_results, email=email)
+    return [abstract for page in efetch_stream(id_list) for abstract in page]
+
+def esearch_ids(query: str, max_results: int = 10, email: str = "") -> List[str]:
+    """
+    Search PubMed and return the matching article IDs.
+
+    Parameters
+    ----------
+    query : str
+        The PubMed search query string.
+
+    max_results : int, optional
+        Maximum number of IDs to return (default is 10).
+
+    email : str, optional
+        User email for NCBI API compliance.
+
+    Returns
+    -------
+    List[str]
+        PubMed IDs in relevance order.
+    """
     if not email:
         raise ValueError("Entrez email must be provided for PubMed API access.")
 
@@ -34,13 +60,64 @@ def search_pubmed(query: str, max_results: int = 10, email: str = "") -> List[st
     record = Entrez.read(handle)
     handle.close()
 
-    id_list = record.get("IdList", [])
-    if not id_list:
-        return []
+    return list(record.get("IdList", []))
 
-    handle = Entrez.efetch(db="pubmed", id=",".join(id_list), rettype="abstract", retmode="text")
-    abstract_text = handle.read()
-    handle.close()
+def efetch_stream(id_list: List[str], page_size: int = FETCH_PAGE_SIZE) -> Iterator[List[str]]:
+    """
+    Fetch abstracts for PubMed IDs one page of IDs at a time.
+
+    Each page is a separate efetch request, so callers can start processing
+    (e.g. embedding) the first abstracts while later pages are still in flight.
+    ``Entrez.email`` must already be set (see ``esearch_ids``).
 
-    entries = abstract_text.strip().split("\n\n")
-    return [entry.strip() for entry in entries if entry.strip()]
+    Parameters
+    ----------
+    id_list : list of str
+        PubMed IDs to fetch.
+
+    page_size : int, optional
+        Number of IDs per efetch request (default is ``FETCH_PAGE_SIZE``).
+
+    Yields
+    ------
+    List[str]
+        The abstracts (title + abstract) of one page of IDs.
+    """
+    for start in range(0, len(id_list), page_size):
+        page_ids = id_list[start:start + page_size]
+        handle = Entrez.efetch(db="pubmed", id=",".join(page_ids), rettype="xml", retmode="xml")
+        try:
+            yield list(iter_abstracts(handle))
+        finally:
+            handle.close()
+
+def iter_abstracts(handle) -> Iterator[str]:
+    """
+    Stream title + abstract text blocks from a PubMed efetch XML handle.
+
+    Articles are parsed one at a time with ``Entrez.parse``, so the full
+    response is never held in memory and abstracts containing blank lines
+    are kept intact.
+
+    Parameters
+    ----------
+    handle : file-like
+        Handle returned by ``Entrez.efetch(..., retmode="xml")``.
+
+    Yields
+    ------
+    str
+        The article title followed by its abstract sections, one per line.
+    """
+    for record in Entrez.parse(handle):
+        citation = record.get("MedlineCitation")
+        if citation is None:  # e.g. PubmedBookArticle entries
+            continue
+        article = citation["Article"]
+        lines = [str(article.get("ArticleTitle", "")).strip()]
+        for section in article.get("Abstract", {}).get("AbstractText", []):
+            label = getattr(section, "attributes", {}).get("Label")
+            lines.append(f"{label}: {section}" if label else str(section))
+        entry = "\n".join(line for line in lines if line)
+        if entry:
+            yield entry
@@ -4,18 +4,56 @@ for generating text embeddings using the free Gemini 1.5 model.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+import numpy as np
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from rag.retry import retry_on_rate_limit
+
 # Load environment variables from .env file
 load_dotenv() # lets you keep your key in a .env file and avoid hardcoding.
 
 # Set API key from environment variable
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Configure Gemini SDK
+# Configure Gemini SDK once per process; the SDK then reuses its underlying
+# client channel, so embedders should be shared rather than rebuilt per call
+# (see ``default_embedder``)
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Maximum number of texts accepted by a single batch embedding request
+MAX_BATCH_SIZE = 100
+
+# Maximum number of batch embedding requests submitted concurrently
+MAX_INFLIGHT_BATCHES = 4
+
+
+@lru_cache(maxsize=2048)
+@retry_on_rate_limit
+def _embed_cached(model_name: str, text: str, task_type: str) -> tuple:
+    """
+    Embed a single text, memoizing the result in-process.
+
+    Repeated queries within the same process reuse the stored vector instead
+    of making another round-trip to the Gemini API. A tuple is returned so the
+    cached value cannot be mutated by callers. Rate-limited calls are retried
+    with exponential backoff.
+    """
+    # Gemini only accepts a title for document embeddings
+    title = "clinical_note" if task_type == "retrieval_document" else None
+    response = genai.embed_content(
+        model=model_name,
+        content=text,
+        task_type=task_type,
+        title=title
+    )
+    embedding = response.get("embedding", [])
+    if not embedding:
+        raise ValueError("Embedding failed: empty response from Gemini API.")
+    return tuple(embedding)
+
 class GeminiEmbedder:
     """
     Wrapper class for generating embeddings using Gemini's Embedding API.
@@ -34,15 +72,23 @@ class GeminiEmbedder:
     def __init__(self, model_name: str = "models/embedding-001"):
         self.model_name = model_name
 
-    def get_embedding(self, text: str) -> list:
+    def get_embedding(self, text: str, task_type: str = "retrieval_document") -> list:
         """
         Generate a vector embedding for a single text input using Gemini API.
 
+        Results are memoized in-process, so embedding the same text twice only
+        calls the API once.
+
         Parameters
         ----------
         text : str
             The input text string to embed.
 
+        task_type : str, optional
+            Gemini task type: "retrieval_document" for indexed content or
+            "retrieval_query" for search queries, which Gemini embeds
+            asymmetrically for better recall (default is "retrieval_document").
+
         Returns
         -------
         list of float
@@ -53,13 +99,127 @@ class GeminiEmbedder:
         ValueError
             If the API response does not contain a valid embedding.
         """
-        response = genai.embed_content(
+        return list(_embed_cached(self.model_name, text, task_type))
+
+    def get_embeddings(self, texts: list) -> np.ndarray:
+        """
+        Generate vector embeddings for multiple texts using batched Gemini API calls.
+
+        Texts are sent in sub-batches of at most ``MAX_BATCH_SIZE`` so that a
+        whole note is embedded in one request instead of one per chunk. When
+        more than one batch is needed they are submitted concurrently
+        (see ``get_embeddings_parallel``).
+
+        Parameters
+        ----------
+        texts : list of str
+            The input text strings to embed.
+
+        Returns
+        -------
+        np.ndarray
+            C-contiguous float32 array of shape (len(texts), dim), rows in the
+            same order as the input texts.
+
+        Raises
+        ------
+        ValueError
+            If the API response does not contain one embedding per input text.
+        """
+        return self.get_embeddings_parallel(texts)
+
+    def get_embeddings_parallel(self, texts: list, batch_size: int = MAX_BATCH_SIZE,
+                                max_inflight: int = MAX_INFLIGHT_BATCHES) -> np.ndarray:
+        """
+        Embed texts in batches, keeping up to ``max_inflight`` requests in flight.
+
+        Parameters
+        ----------
+        texts : list of str
+            The input text strings to embed.
+
+        batch_size : int, optional
+            Number of texts per API request (default is ``MAX_BATCH_SIZE``).
+
+        max_inflight : int, optional
+            Maximum number of concurrent API requests (default is ``MAX_INFLIGHT_BATCHES``).
+
+        Returns
+        -------
+        np.ndarray
+            C-contiguous float32 array of shape (len(texts), dim), rows in the
+            same order as the input texts.
+        """
+        starts = range(0, len(texts), batch_size)
+        if not starts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Batch results are copied straight into one contiguous buffer at their
+        # row offset, so order is preserved regardless of completion order
+        embeddings = None
+
+        def _fill(start: int, batch_embeddings: np.ndarray):
+            nonlocal embeddings
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch_embeddings.shape[1]), dtype=np.float32)
+            embeddings[start:start + len(batch_embeddings)] = batch_embeddings
+
+        if len(starts) == 1 or max_inflight <= 1:
+            for start in starts:
+                _fill(start, self._embed_batch(texts[start:start + batch_size]))
+            return embeddings
+
+        executor = ThreadPoolExecutor(max_workers=min(max_inflight, len(starts)))
+        try:
+            futures = {
+                executor.submit(self._embed_batch, texts[start:start + batch_size]): start
+                for start in starts
+            }
+            for future in as_completed(futures):
+                _fill(futures[future], future.result())
+        except BaseException:
+            # Fail fast: drop queued batches and don't wait for in-flight ones
+            # (which may still be backing off) before reporting the error
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+        return embeddings
+
+    def _embed_batch(self, batch: list) -> np.ndarray:
+        """
+        Embed a single batch of texts, retrying with exponential backoff when
+        the API rate limit is hit.
+
+        Raises
+        ------
+        ValueError
+            If the API response does not contain one embedding per input text.
+
+        RuntimeError
+            If the rate limit is still exceeded after multiple retries.
+        """
+        response = self._embed_content(batch)
+        batch_embeddings = response.get("embedding", [])
+        if len(batch_embeddings) != len(batch):
+            raise ValueError("Embedding failed: incomplete batch response from Gemini API.")
+        return np.asarray(batch_embeddings, dtype=np.float32)
+
+    @retry_on_rate_limit
+    def _embed_content(self, batch: list) -> dict:
+        return genai.embed_content(
             model=self.model_name,
-            content=text,
-            task_type="retrieval_document",  # Use "retrieval_query" for queries
+            content=batch,
+            task_type="retrieval_document",
             title="clinical_note"
         )
-        embedding = response.get("embedding", [])
-        if not embedding:
-            raise ValueError("Embedding failed: empty response from Gemini API.")
-        return embedding
\ No newline at end of file
+
+
+@lru_cache(maxsize=None)
+def default_embedder() -> GeminiEmbedder:
+    """
+    Return the process-wide ``GeminiEmbedder``, creating it on first use.
+
+    Pipelines call this instead of constructing a new embedder per request.
+    """
+    return GeminiEmbedder()
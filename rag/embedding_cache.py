@@ -0,0 +1,155 @@
+"""
+This module provides a persistent, content-addressed cache for text
+embeddings so that identical text is never sent to the Gemini API twice.
+"""
+
+import hashlib
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+from rag.embedder import default_embedder
+
+# SQLite caps the number of bound parameters per statement (999 on older builds)
+_MAX_SQL_PARAMS = 500
+
+
+class CachedEmbedder:
+    """
+    Wrapper around an embedder that stores vectors in an on-disk SQLite cache.
+
+    Each text is keyed by the SHA-256 hash of its content together with the
+    embedding model name, so re-indexing the same note or re-fetching the same
+    PubMed abstracts is served from disk instead of the API.
+
+    Parameters
+    ----------
+    embedder : GeminiEmbedder
+        The underlying embedder used for cache misses.
+
+    cache_path : str or Path, optional
+        Location of the SQLite database (default is '.cache/embeddings.sqlite').
+
+    Attributes
+    ----------
+    embedder : GeminiEmbedder
+        The wrapped embedder.
+
+    model_name : str
+        The embedding model name of the wrapped embedder.
+    """
+
+    def __init__(self, embedder, cache_path: Union[str, Path] = ".cache/embeddings.sqlite"):
+        self.embedder = embedder
+        self.model_name = embedder.model_name
+
+        cache_path = Path(cache_path)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(cache_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "hash TEXT NOT NULL, model TEXT NOT NULL, vec BLOB NOT NULL, "
+            "PRIMARY KEY (hash, model))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _lookup(self, hashes: list) -> dict:
+        found = {}
+        for start in range(0, len(hashes), _MAX_SQL_PARAMS):
+            batch = hashes[start:start + _MAX_SQL_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                [self.model_name, *batch],
+            )
+            for h, vec in rows:
+                found[h] = np.frombuffer(vec, dtype=np.float32)
+        return found
+
+    def _store(self, hashes: list, embeddings: np.ndarray):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (hash, model, vec) VALUES (?, ?, ?)",
+            [
+                (h, self.model_name, vec.tobytes())
+                for h, vec in zip(hashes, embeddings)
+            ],
+        )
+        self._conn.commit()
+
+    def get_embedding(self, text: str, task_type: str = "retrieval_document") -> list:
+        """
+        Return the embedding for a single text, using the cache when possible.
+
+        Parameters
+        ----------
+        text : str
+            The input text string to embed.
+
+        task_type : str, optional
+            Gemini task type (default is "retrieval_document"). Only document
+            embeddings are stored on disk; other task types, such as
+            "retrieval_query", are delegated to the wrapped embedder and its
+            in-process cache.
+
+        Returns
+        -------
+        list of float
+            The embedding vector representing the input text.
+        """
+        if task_type != "retrieval_document":
+            return self.embedder.get_embedding(text, task_type=task_type)
+        return self.get_embeddings([text])[0].tolist()
+
+    def get_embeddings(self, texts: list) -> np.ndarray:
+        """
+        Return embeddings for multiple texts, embedding only the uncached ones.
+
+        Parameters
+        ----------
+        texts : list of str
+            The input text strings to embed.
+
+        Returns
+        -------
+        np.ndarray
+            C-contiguous float32 array of shape (len(texts), dim), rows in the
+            same order as the input texts.
+        """
+        hashes = [self._hash(t) for t in texts]
+        cached = self._lookup(list(set(hashes)))
+
+        # Embed each missing text once, even if it appears several times
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+
+        if missing:
+            new_embeddings = self.embedder.get_embeddings(list(missing.values()))
+            self._store(list(missing.keys()), new_embeddings)
+            cached.update(zip(missing.keys(), new_embeddings))
+
+        if not hashes:
+            return np.empty((0, 0), dtype=np.float32)
+
+        embeddings = np.empty((len(hashes), len(cached[hashes[0]])), dtype=np.float32)
+        for row, h in enumerate(hashes):
+            embeddings[row] = cached[h]
+        return embeddings
+
+
+@lru_cache(maxsize=None)
+def default_cached_embedder() -> CachedEmbedder:
+    """
+    Return the process-wide ``CachedEmbedder`` wrapping ``default_embedder()``.
+
+    The SQLite connection is opened once and shared by all pipeline runs.
+    """
+    return CachedEmbedder(default_embedder())
@@ -3,19 +3,28 @@ This module provides a wrapper for generating answers using the
 Gemini 1.5 Pro model from Google's Generative AI API.
 """
 
-import time
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 import google.generativeai as genai
-from google.api_core.exceptions import ResourceExhausted
+
+from rag.retry import retry_on_rate_limit
 
 # Load environment variables (e.g., GEMINI_API_KEY)
 load_dotenv()
 
-# Configure Gemini with your API key
+# Configure Gemini with your API key once per process; the SDK reuses its
+# client channel, so never rebuild GenerativeModel per call (see
+# ``default_generator``)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Maximum number of generated answers kept in memory per generator
+ANSWER_CACHE_SIZE = 256
+
+# Default approximate token budget for the retrieved context in a prompt
+MAX_CONTEXT_TOKENS = 2000
+
 
 class GeminiGenerator:
     """
@@ -26,14 +35,23 @@ class GeminiGenerator:
     model_name : str, optional
         The name of the generative model to use (default is "gemini-1.5-pro").
 
+    max_context_tokens : int, optional
+        Approximate token budget (~4 characters per token) for the context
+        placed in each prompt (default is ``MAX_CONTEXT_TOKENS``).
+
     Attributes
     ----------
     model : generativeai.GenerativeModel
         Instance of the generative model used to produce completions.
+
+    max_context_tokens : int
+        Approximate token budget for the prompt context.
     """
 
-    def __init__(self, model_name: str = "gemini-1.5-pro"):
+    def __init__(self, model_name: str = "gemini-1.5-pro", max_context_tokens: int = MAX_CONTEXT_TOKENS):
         self.model = genai.GenerativeModel(model_name)
+        self.max_context_tokens = max_context_tokens
+        self._answer_cache = {}  # (query, context_chunks) -> generated answer
 
     def generate_answer(self, query: str, context_chunks: list) -> str: # takes a list of context chunks + query and builds a structured prompt
         """
@@ -56,7 +74,20 @@ class GeminiGenerator:
         ------
         RuntimeError
             If the Gemini model fails to return a response.
+
+        Notes
+        -----
+        Duplicate chunks are dropped and the remaining ones are kept in
+        retrieval order until ``max_context_tokens`` is reached, so the prompt
+        does not grow with redundant context. Answers are cached per
+        (query, trimmed context), so asking the same question over the same
+        retrieved context does not call the model again.
         """
+        context_chunks = self._trim_context(context_chunks)
+        cache_key = (query, tuple(context_chunks))
+        if cache_key in self._answer_cache:
+            return self._answer_cache[cache_key]
+
         # Construct a structured prompt
         prompt = (
             "You are a helpful clinical assistant. Based on the following information, "
@@ -66,14 +97,49 @@ class GeminiGenerator:
             + f"\n\nQuestion: {query}\nAnswer:"
         )
 
-        for attempt in range(3):  # max 3 tries
-            try:
-                response = self.model.generate_content(prompt)
-                return response.text
-            except ResourceExhausted as e:
-                print(" Rate limit hit. Waiting 60s before retrying...")
-                time.sleep(60)
-            except Exception as e:
-                raise RuntimeError(f"Gemini generation failed: {str(e)}")
-
-        raise RuntimeError("Gemini generation failed after multiple retries.")
\ No newline at end of file
+        try:
+            answer = self._generate(prompt)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Gemini generation failed: {str(e)}")
+
+        self._cache_answer(cache_key, answer)
+        return answer
+
+    @retry_on_rate_limit
+    def _generate(self, prompt: str) -> str:
+        """Call the model, retrying with exponential backoff on rate limits."""
+        return self.model.generate_content(prompt).text
+
+    def _trim_context(self, context_chunks: list) -> list:
+        """Drop duplicate chunks and keep the leading ones that fit the token budget."""
+        budget = self.max_context_tokens * 4  # ~4 characters per token
+        trimmed = []
+        used = 0
+        for chunk in dict.fromkeys(context_chunks):
+            if used + len(chunk) > budget:
+                if not trimmed:
+                    # Never send an empty context; cut the top chunk to fit
+                    trimmed.append(chunk[:budget])
+                break
+            trimmed.append(chunk)
+            used += len(chunk)
+        return trimmed
+
+    def _cache_answer(self, key: tuple, answer: str):
+        """Store an answer, evicting the oldest entry once the cache is full."""
+        if len(self._answer_cache) >= ANSWER_CACHE_SIZE:
+            self._answer_cache.pop(next(iter(self._answer_cache)))
+        self._answer_cache[key] = answer
+
+
+@lru_cache(maxsize=None)
+def default_generator() -> GeminiGenerator:
+    """
+    Return the process-wide ``GeminiGenerator``, creating it on first use.
+
+    Reusing one generator avoids rebuilding the model object on every request
+    and lets its answer cache persist across pipeline runs.
+    """
+    return GeminiGenerator()
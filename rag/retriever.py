@@ -3,9 +3,54 @@ This module provides functions to build and query a FAISS index
 for fast semantic similarity search using text embeddings.
 """
 
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Union
+
 import faiss
 import numpy as np
 
+# Corpora larger than this are indexed with HNSW instead of brute-force search
+HNSW_THRESHOLD = 10_000
+
+# HNSW graph parameters (neighbors per node, build and search breadth)
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# IVF-PQ parameters (sub-quantizers, bits per code, probed lists at search)
+IVFPQ_M = 16
+IVFPQ_NBITS = 8
+IVFPQ_NPROBE = 16
+
+# Fewer vectors than this are too few to train IVF-PQ; SQ8 is used instead
+IVFPQ_MIN_TRAIN = 10_000
+
+# Flat indexes smaller than this are searched with a numpy matrix product,
+# which beats FAISS's per-call setup and thread-pool overhead at this size
+NUMPY_THRESHOLD = 512
+
+# CPU index types that index_cpu_to_gpu can clone (the SQ8 and HNSW
+# variants have no GPU implementation and stay on CPU)
+_GPU_INDEX_TYPES = (faiss.IndexFlat, faiss.IndexIVFPQ)
+
+# File names used by FaissRetriever.save / FaissRetriever.load
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.pkl"
+
+
+def gpu_available() -> bool:
+    """Return True if FAISS was built with GPU support and a GPU is visible."""
+    return hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0
+
+
+@lru_cache(maxsize=None)
+def _gpu_resources():
+    """Shared GPU scratch memory, allocated once per process."""
+    return faiss.StandardGpuResources()
+
 
 class FaissRetriever:
     """
@@ -15,25 +60,265 @@ class FaissRetriever:
     ----------
     embedding_dim : int
         Dimension of the embedding vectors.
+
+    metric : str, optional
+        Similarity metric: "ip" for cosine similarity via inner product on
+        L2-normalized vectors, or "l2" for Euclidean distance (default is "ip").
+
+    index_type : str, optional
+        FAISS index to use: "flat" for exact search, "hnsw" for approximate
+        graph search, or "auto" to switch to HNSW once the corpus exceeds
+        ``HNSW_THRESHOLD`` vectors (default is "auto").
+
+    quantizer : str, optional
+        How stored vectors are encoded: "none" for full float32, "sq8" for
+        8-bit scalar quantization (4x smaller, near-identical recall), or
+        "ivfpq" for an IVF-PQ index sized to the corpus, which falls back to
+        "sq8" below ``IVFPQ_MIN_TRAIN`` vectors (default is "none").
+
+    use_gpu : bool, optional
+        Move the built index to GPU 0 when FAISS has GPU support and a GPU is
+        present. Only flat and IVF-PQ indexes are moved; HNSW and SQ8 indexes
+        have no GPU implementation and stay on CPU (default is True).
     """
 
-    def __init__(self, embedding_dim: int):
+    def __init__(self, embedding_dim: int, metric: str = "ip", index_type: str = "auto",
+                 quantizer: str = "none", use_gpu: bool = True):
+        if metric not in ("ip", "l2"):
+            raise ValueError(f"Unsupported metric: {metric}. Use 'ip' or 'l2'.")
+        if index_type not in ("auto", "flat", "hnsw"):
+            raise ValueError(f"Unsupported index type: {index_type}. Use 'auto', 'flat' or 'hnsw'.")
+        if quantizer not in ("none", "sq8", "ivfpq"):
+            raise ValueError(f"Unsupported quantizer: {quantizer}. Use 'none', 'sq8' or 'ivfpq'.")
+        if quantizer == "ivfpq" and index_type == "hnsw":
+            raise ValueError("The 'ivfpq' quantizer cannot be combined with an HNSW index.")
+
         self.embedding_dim = embedding_dim
-        self.index = faiss.IndexFlatL2(embedding_dim)
+        self.metric = metric
+        self.index_type = index_type
+        self.quantizer = quantizer
+        self.use_gpu = use_gpu
+        self._pending = []  # Vectors buffered by add until finalize trains the index
+        self.index = self._create_index("hnsw" if index_type == "hnsw" else "flat")
         self.chunk_store = []  # Store original text chunks aligned with embeddings
+        self._mat = None  # Dense copy of small flat indexes for numpy search
+
+    def _create_index(self, index_type: str, n_vectors: int = 0):
+        """Create an empty FAISS index of the given type for the configured metric and quantizer."""
+        faiss_metric = faiss.METRIC_INNER_PRODUCT if self.metric == "ip" else faiss.METRIC_L2
+        quantizer = self.quantizer
+        if quantizer == "ivfpq" and n_vectors < IVFPQ_MIN_TRAIN:
+            quantizer = "sq8"
 
-    def build_index(self, embeddings: list, chunks: list):
+        if quantizer == "ivfpq":
+            nlist = int(np.sqrt(n_vectors))
+            coarse = faiss.IndexFlatIP(self.embedding_dim) if self.metric == "ip" else faiss.IndexFlatL2(self.embedding_dim)
+            index = faiss.IndexIVFPQ(coarse, self.embedding_dim, nlist, IVFPQ_M, IVFPQ_NBITS, faiss_metric)
+            index.nprobe = IVFPQ_NPROBE
+            return index
+        if index_type == "hnsw":
+            if quantizer == "sq8":
+                index = faiss.IndexHNSWSQ(self.embedding_dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss_metric)
+            else:
+                index = faiss.IndexHNSWFlat(self.embedding_dim, HNSW_M, faiss_metric)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+            return index
+        if quantizer == "sq8":
+            return faiss.IndexScalarQuantizer(self.embedding_dim, faiss.ScalarQuantizer.QT_8bit, faiss_metric)
+        if self.metric == "ip":
+            return faiss.IndexFlatIP(self.embedding_dim)
+        return faiss.IndexFlatL2(self.embedding_dim)
+
+    def build_index(self, embeddings: np.ndarray, chunks: list, copy: bool = True):
         """
         Build a FAISS index from embeddings and store the corresponding text chunks.
 
         Parameters
         ----------
-        embeddings : list of list of float
-            List of embedding vectors for each chunk.
+        embeddings : np.ndarray
+            Array of shape (len(chunks), embedding_dim) with one embedding per
+            chunk. Lists of vectors are also accepted and converted.
+
+        chunks : list of str
+            Original text chunks corresponding to each embedding.
+
+        copy : bool, optional
+            If False, a C-contiguous float32 array (as returned by
+            ``GeminiEmbedder.get_embeddings``) is indexed without copying and,
+            for the "ip" metric, is L2-normalized in place. Pass False only for
+            arrays the caller no longer needs unmodified (default is True).
+
+        Raises
+        ------
+        ValueError
+            If the number of embeddings and chunks do not match.
+        """
+        if len(embeddings) != len(chunks):
+            raise ValueError("Mismatch between number of embeddings and text chunks.")
+
+        arr = self._prepare_vectors(embeddings, copy)
+        self.chunk_store = list(chunks)
+        self._pending = []
+        self._index_vectors(arr)
+
+        self._update_small_matrix()
+        self._maybe_move_to_gpu()
+
+    def _index_vectors(self, arr: np.ndarray):
+        """Index prepared vectors in a fresh CPU index chosen for the corpus size."""
+        # Always start from a fresh CPU index so rebuilding replaces, rather
+        # than appends to, whatever was indexed (or moved to GPU) before
+        if self.quantizer == "ivfpq":
+            self.index = self._create_index("flat", len(arr))
+        elif self.index_type == "hnsw" or (self.index_type == "auto" and len(arr) > HNSW_THRESHOLD):
+            self.index = self._create_index("hnsw")
+        else:
+            self.index = self._create_index("flat")
+
+        # Quantized indexes learn their codebooks from the corpus before adding
+        if not self.index.is_trained:
+            self.index.train(arr)
+        self.index.add(arr)
+
+    def _prepare_vectors(self, embeddings: np.ndarray, copy: bool) -> np.ndarray:
+        """Return embeddings as a C-contiguous float32 array, normalized for "ip"."""
+        arr = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if self.metric == "ip":
+            # Only copy when conversion did not already produce a new array
+            if copy and np.may_share_memory(arr, embeddings):
+                arr = arr.copy()
+            faiss.normalize_L2(arr)
+        return arr
+
+    def _update_small_matrix(self):
+        """Keep a dense copy of the vectors while the index is small and flat."""
+        if isinstance(self.index, faiss.IndexFlat) and self.index.ntotal < NUMPY_THRESHOLD:
+            self._mat = self.index.reconstruct_n(0, self.index.ntotal)
+        else:
+            self._mat = None
+
+    def _maybe_move_to_gpu(self):
+        """Transfer the index to GPU 0 if enabled, available and supported."""
+        if not (self.use_gpu and gpu_available()):
+            return
+        if isinstance(self.index, faiss.GpuIndex):  # already on GPU
+            return
+        if isinstance(self.index, _GPU_INDEX_TYPES):
+            self.index = faiss.index_cpu_to_gpu(_gpu_resources(), 0, self.index)
+
+    def save(self, directory: Union[str, Path]):
+        """
+        Persist the index and its text chunks so they can be reloaded with ``load``.
+
+        Writes ``INDEX_FILE`` with ``faiss.write_index`` and a ``CHUNKS_FILE``
+        pickle holding the chunk store and retriever settings. Each file is
+        written under a temporary name and moved into place with
+        ``os.replace``, the pickle last, so an interrupted save never leaves a
+        truncated file behind and ``CHUNKS_FILE`` only exists next to the
+        index it describes.
+
+        Parameters
+        ----------
+        directory : str or Path
+            Directory to write into; created if it does not exist.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        index = self.index
+        if gpu_available() and isinstance(index, faiss.GpuIndex):
+            index = faiss.index_gpu_to_cpu(index)
+
+        # Invalidate any previous save before its index file is replaced
+        (directory / CHUNKS_FILE).unlink(missing_ok=True)
+
+        tmp_suffix = f".{os.getpid()}.tmp"
+        index_tmp = directory / (INDEX_FILE + tmp_suffix)
+        faiss.write_index(index, str(index_tmp))
+        os.replace(index_tmp, directory / INDEX_FILE)
+
+        state = {
+            "embedding_dim": self.embedding_dim,
+            "metric": self.metric,
+            "index_type": self.index_type,
+            "quantizer": self.quantizer,
+            "chunk_store": self.chunk_store,
+        }
+        chunks_tmp = directory / (CHUNKS_FILE + tmp_suffix)
+        with open(chunks_tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(chunks_tmp, directory / CHUNKS_FILE)
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], use_gpu: bool = True) -> "FaissRetriever":
+        """
+        Load a retriever previously written by ``save``.
+
+        The index is opened with ``faiss.IO_FLAG_MMAP`` so that large indexes
+        are memory-mapped rather than read into memory up front.
+
+        Parameters
+        ----------
+        directory : str or Path
+            Directory passed to ``save``.
+
+        use_gpu : bool, optional
+            Move the loaded index to GPU when available (default is True).
+
+        Returns
+        -------
+        FaissRetriever
+            Retriever ready for ``retrieve`` / ``retrieve_batch``.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the directory does not contain a complete saved index.
+        """
+        directory = Path(directory)
+        if not (directory / CHUNKS_FILE).exists() or not (directory / INDEX_FILE).exists():
+            raise FileNotFoundError(f"No saved index found in: {directory}")
+
+        with open(directory / CHUNKS_FILE, "rb") as f:
+            state = pickle.load(f)
+
+        retriever = cls(
+            state["embedding_dim"],
+            metric=state["metric"],
+            index_type=state["index_type"],
+            quantizer=state["quantizer"],
+            use_gpu=use_gpu,
+        )
+        retriever.index = faiss.read_index(str(directory / INDEX_FILE), faiss.IO_FLAG_MMAP)
+        retriever.chunk_store = state["chunk_store"]
+        retriever._update_small_matrix()
+        retriever._maybe_move_to_gpu()
+        return retriever
+
+    def add(self, embeddings: np.ndarray, chunks: list, copy: bool = True):
+        """
+        Append embeddings and their text chunks to the current index.
+
+        Unlike ``build_index`` this keeps the existing index type, so corpora can
+        be indexed batch by batch as they are embedded. Quantized indexes need
+        the whole corpus to train their codebooks, so while the index is
+        untrained the vectors are only buffered and nothing is searchable until
+        ``finalize``. Always call ``finalize`` after the last batch; it also
+        applies HNSW auto-promotion and GPU placement.
+
+        Parameters
+        ----------
+        embeddings : np.ndarray
+            Array of shape (len(chunks), embedding_dim).
 
         chunks : list of str
             Original text chunks corresponding to each embedding.
 
+        copy : bool, optional
+            If False, a C-contiguous float32 array is L2-normalized in place
+            for the "ip" metric instead of being copied (default is True).
+
         Raises
         ------
         ValueError
@@ -41,17 +326,73 @@ class FaissRetriever:
         """
         if len(embeddings) != len(chunks):
             raise ValueError("Mismatch between number of embeddings and text chunks.")
+        if not len(chunks):
+            return
 
-        self.chunk_store = chunks
-        self.index.add(np.array(embeddings).astype("float32"))
+        arr = self._prepare_vectors(embeddings, copy)
+        self.chunk_store.extend(chunks)
 
-    def retrieve(self, query_embedding: list, top_k: int = 3) -> list:
+        if self._pending or not self.index.is_trained:
+            # Keep a private copy: the buffer outlives the caller's array
+            if copy and np.may_share_memory(arr, embeddings):
+                arr = arr.copy()
+            self._pending.append(arr)
+            return
+
+        self.index.add(arr)
+        self._update_small_matrix()
+
+    def finalize(self):
+        """
+        Finish an ingest done through ``add`` so it matches ``build_index``.
+
+        Vectors buffered for a quantized index are trained on and indexed as a
+        whole, with the same index choice (IVF-PQ sizing, HNSW promotion) as
+        ``build_index``. An "auto" flat or SQ8 index that has grown past
+        ``HNSW_THRESHOLD`` vectors is re-indexed into HNSW. The index is then
+        moved to GPU when enabled. Call this once after the last ``add``.
+        """
+        if self._pending:
+            vectors = np.concatenate(self._pending)
+            self._pending = []
+            self._index_vectors(vectors)
+        elif (self.index_type == "auto" and self.quantizer != "ivfpq"
+                and self.index.ntotal > HNSW_THRESHOLD
+                and isinstance(self.index, (faiss.IndexFlat, faiss.IndexScalarQuantizer))):
+            self._index_vectors(self.index.reconstruct_n(0, self.index.ntotal))
+
+        self._update_small_matrix()
+        self._maybe_move_to_gpu()
+
+    def _search(self, query_mat: np.ndarray, top_k: int) -> np.ndarray:
+        """
+        Return the (M, k) row indices of the nearest vectors for each query.
+
+        Small flat indexes are scored with a single matrix product and
+        ``np.argpartition``; everything else goes through ``index.search``.
+        """
+        if self._mat is None:
+            distances, indices = self.index.search(query_mat, top_k)
+            return indices
+
+        k = min(top_k, len(self._mat))
+        if k <= 0:
+            return np.empty((len(query_mat), 0), dtype=np.int64)
+        scores = query_mat @ self._mat.T
+        if self.metric == "l2":
+            # Ranking by -||q - x||^2 only needs 2 q.x - ||x||^2
+            scores = 2 * scores - np.einsum("ij,ij->i", self._mat, self._mat)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        return np.take_along_axis(top, order, axis=1)
+
+    def retrieve(self, query_embedding: np.ndarray, top_k: int = 3) -> list:
         """
         Retrieve top-k most similar text chunks for a given query embedding.
 
         Parameters
         ----------
-        query_embedding : list of float
+        query_embedding : np.ndarray or list of float
             The embedding vector of the query.
 
         top_k : int, optional
@@ -62,6 +403,38 @@ class FaissRetriever:
         list of str
             List of retrieved text chunks sorted by similarity.
         """
-        query_vec = np.array([query_embedding]).astype("float32")
-        distances, indices = self.index.search(query_vec, top_k)
-        return [self.chunk_store[i] for i in indices[0] if i < len(self.chunk_store)]
+        # Copy so that normalization never mutates the caller's vector
+        query_vec = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
+        if self.metric == "ip":
+            faiss.normalize_L2(query_vec)
+        indices = self._search(query_vec, top_k)
+        return [self.chunk_store[i] for i in indices[0] if 0 <= i < len(self.chunk_store)]
+
+    def retrieve_batch(self, query_embeddings: np.ndarray, top_k: int = 3) -> list:
+        """
+        Retrieve top-k most similar text chunks for several query embeddings at once.
+
+        A single FAISS search over an (M, d) query matrix lets FAISS use its
+        multi-threaded, BLAS-batched code path, so prefer this over repeated
+        ``retrieve`` calls in evaluation or grid-search harnesses.
+
+        Parameters
+        ----------
+        query_embeddings : np.ndarray
+            Array of shape (M, embedding_dim) with one query embedding per row.
+
+        top_k : int, optional
+            Number of most similar chunks to return per query (default is 3).
+
+        Returns
+        -------
+        list of list of str
+            For each query, the retrieved text chunks sorted by similarity.
+        """
+        # Copy so that normalization never mutates the caller's matrix
+        query_mat = np.array(query_embeddings, dtype=np.float32).reshape(-1, self.embedding_dim)
+        if self.metric == "ip":
+            faiss.normalize_L2(query_mat)
+        indices = self._search(query_mat, top_k)
+        n_chunks = len(self.chunk_store)
+        return [[self.chunk_store[i] for i in row if 0 <= i < n_chunks] for row in indices]
@@ -0,0 +1,35 @@
+"""
+This module provides the shared retry policy for Gemini API calls:
+exponential backoff with jitter whenever the rate limit is hit.
+"""
+
+from google.api_core.exceptions import ResourceExhausted
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+
+# Maximum number of attempts per Gemini request, including the first one
+MAX_ATTEMPTS = 5
+
+# Backoff bounds in seconds (1s, 2s, 4s, ... plus jitter, capped)
+BACKOFF_INITIAL = 1
+BACKOFF_MAX = 60
+
+
+def _log_retry(retry_state):
+    print(f" Rate limit hit. Waiting {retry_state.next_action.sleep:.1f}s before retrying...")
+
+
+def _give_up(retry_state):
+    raise RuntimeError(
+        f"Gemini request failed after {retry_state.attempt_number} attempts."
+    ) from retry_state.outcome.exception()
+
+
+# Decorator retrying a Gemini call on ResourceExhausted (HTTP 429). Any other
+# exception propagates immediately; exhausting all attempts raises RuntimeError.
+retry_on_rate_limit = retry(
+    retry=retry_if_exception_type(ResourceExhausted),
+    wait=wait_exponential_jitter(initial=BACKOFF_INITIAL, max=BACKOFF_MAX),
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    before_sleep=_log_retry,
+    retry_error_callback=_give_up,
+)
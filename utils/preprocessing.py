@@ -1,7 +1,17 @@
+import io
 import re
 import json
 from pathlib import Path
-from typing import Union
+from typing import Callable, Iterator, Optional, Union
+
+# Runs of blank lines collapsed by clean_text
+_MULTI_NL = re.compile(r"\n{2,}")
+
+# EHR sections listing coded entries: (EHR key, heading, concept field)
+_CODED_SECTIONS = (
+    ("conditions", "Conditions", "code"),
+    ("medications", "Medications", "medicationCodeableConcept"),
+)
 
 def clean_text(text: str) -> str:
     """
@@ -17,10 +27,9 @@ def clean_text(text: str) -> str:
     str
         Cleaned clinical text with consistent formatting.
     """
-    text = re.sub(r"\n{2,}", "\n", text)
-    return text.strip()
+    return _MULTI_NL.sub("\n", text).strip()
 
-def chunk_text(text: str, max_tokens: int = 300) -> list:
+def chunk_text(text: str, max_tokens: int = 300, tokenizer: Optional[Callable[[str], list]] = None) -> list:
     """
     Split cleaned text into approximately token-sized chunks.
 
@@ -32,23 +41,86 @@ def chunk_text(text: str, max_tokens: int = 300) -> list:
     max_tokens : int, optional
         Approximate max tokens per chunk (default is 300).
 
+    tokenizer : callable, optional
+        Function returning the tokens of a string (e.g. ``tiktoken``'s
+        ``encoding.encode``). When given, chunk sizes are measured in real
+        tokens; otherwise ~4 characters are assumed per token.
+
     Returns
     -------
     list of str
         List of text chunks.
     """
-    paragraphs = text.split("\n")
-    chunks = []
-    chunk = ""
-    for para in paragraphs:
-        if len(chunk) + len(para) < max_tokens * 4:  # ~4 characters per token
-            chunk += para + "\n"
-        else:
-            chunks.append(chunk.strip())
-            chunk = para + "\n"
+    return list(iter_chunks(text, max_tokens=max_tokens, tokenizer=tokenizer))
+
+def iter_chunks(text: str, max_tokens: int = 300,
+                tokenizer: Optional[Callable[[str], list]] = None) -> Iterator[str]:
+    """
+    Lazily split cleaned text into approximately token-sized chunks.
+
+    Paragraphs are packed greedily in a single pass and each chunk is joined
+    once, so long notes do not pay for repeated string concatenation. Chunks
+    are yielded as soon as they are complete, letting callers embed and index
+    them in batches without holding every chunk in memory.
+
+    Parameters
+    ----------
+    text : str
+        Input text to split.
+
+    max_tokens : int, optional
+        Approximate max tokens per chunk (default is 300).
+
+    tokenizer : callable, optional
+        Function returning the tokens of a string; see ``chunk_text``.
+
+    Yields
+    ------
+    str
+        The next text chunk.
+    """
+    if tokenizer is None:
+        budget = max_tokens * 4  # ~4 characters per token
+        measure = len
+    else:
+        budget = max_tokens
+        measure = lambda s: len(tokenizer(s))
+
+    buf = []
+    buf_len = 0
+    for para in text.splitlines():
+        para_len = measure(para)
+        if buf and buf_len + para_len >= budget:
+            chunk = "".join(buf).strip()
+            if chunk:  # skip buffers holding only whitespace lines
+                yield chunk
+            buf = []
+            buf_len = 0
+        buf.append(para + "\n")
+        buf_len += para_len + (1 if tokenizer is None else 0)
+    chunk = "".join(buf).strip()
     if chunk:
-        chunks.append(chunk.strip())
-    return chunks
+        yield chunk
+
+def deduplicate_chunks(chunks: list) -> tuple:
+    """
+    Collapse repeated chunks so each distinct text is embedded only once.
+
+    Parameters
+    ----------
+    chunks : list of str
+        Text chunks, possibly containing exact duplicates.
+
+    Returns
+    -------
+    tuple of (list of str, list of int)
+        The unique chunks in first-seen order, and for each input chunk the
+        position of its text in the unique list, so that
+        ``unique_embeddings[inverse]`` restores one row per input chunk.
+    """
+    positions = {}
+    inverse = [positions.setdefault(c, len(positions)) for c in chunks]
+    return list(positions), inverse
 
 def load_patient_data(path: Union[str, Path]) -> str:
     """
@@ -93,38 +165,34 @@ def extract_text_from_ehr(ehr: dict) -> str:
     str
         Free-text formatted summary of patient data.
     """
-    lines = []
+    buf = io.StringIO()
+    write = buf.write
 
     # Patient demographics
-    patient = ehr.get("name", "Unknown")
-    lines.append(f"Patient: {patient}")
+    write(f"Patient: {ehr.get('name', 'Unknown')}")
     if "gender" in ehr:
-        lines.append(f"Gender: {ehr['gender']}")
+        write(f"\nGender: {ehr['gender']}")
     if "birthDate" in ehr:
-        lines.append(f"Birth Date: {ehr['birthDate']}")
-
-    # Medical conditions
-    if "conditions" in ehr:
-        lines.append("\nConditions:")
-        for c in ehr["conditions"]:
-            lines.append(f"- {c.get('code', {}).get('text', '')}")
+        write(f"\nBirth Date: {ehr['birthDate']}")
 
-    # Medications
-    if "medications" in ehr:
-        lines.append("\nMedications:")
-        for m in ehr["medications"]:
-            lines.append(f"- {m.get('medicationCodeableConcept', {}).get('text', '')}")
+    # Medical conditions and medications
+    for key, header, concept in _CODED_SECTIONS:
+        if key in ehr:
+            write(f"\n\n{header}:")
+            for item in ehr[key]:
+                write(f"\n- {(item.get(concept) or {}).get('text', '')}")
 
     # Observations and labs
     if "observations" in ehr:
-        lines.append("\nObservations:")
+        write("\n\nObservations:")
         for o in ehr["observations"]:
-            val = o.get("valueQuantity", {}).get("value")
-            unit = o.get("valueQuantity", {}).get("unit")
-            text = o.get("code", {}).get("text", "")
+            vq = o.get("valueQuantity") or {}
+            val = vq.get("value")
+            unit = vq.get("unit")
+            text = (o.get("code") or {}).get("text", "")
             if val and unit:
-                lines.append(f"- {text}: {val} {unit}")
+                write(f"\n- {text}: {val} {unit}")
             elif text:
-                lines.append(f"- {text}")
+                write(f"\n- {text}")
 
-    return "\n".join(lines)
+    return buf.getvalue()